@@ -2,9 +2,12 @@
 Importamos las librerías necesarias para realizar el algoritmo evolutivo.
 - random: librería para generar números aleatorios, será útil al realizar la mutación y crear el rompecabezas.
 - time: librería para medir el tiempo de ejecución y de esta manera optimizarlo al variar los parámetros del algoritmo evolutivo.
+- collections.abc y types: clases base para la vista de extremos de PiezaCompacta y diccionarios de solo lectura para su tabla de extremos.
 '''
 import random
 import time
+from collections.abc import MutableMapping
+from types import MappingProxyType
 
 '''
 Definición de variables globales para la función de aptitud.
@@ -16,6 +19,32 @@ PENALIZACION_BORDE_NO_LISO = 1
 PENALIZACION_CONEXION_INCORRECTA = 1
 PENALIZACION_PIEZA_FUERA_DE_POSICION = 4
 
+'''
+Definición de variables globales para la visualización.
+UMBRAL_VISUALIZACION indica el número máximo de renglones y columnas que se dibujan; en rompecabezas más grandes solo se muestra una ventana.
+MAX_ERRORES_VISUALIZADOS indica cuántas conexiones incorrectas se listan antes de resumir el resto.
+'''
+UMBRAL_VISUALIZACION = 20
+MAX_ERRORES_VISUALIZADOS = 20
+
+'''
+Definición de variables globales para el modo adaptativo del algoritmo evolutivo.
+TASA_EXITO_OBJETIVO indica la proporción de mutaciones exitosas (mejores que su padre) que busca mantener la regla de 1/5 de éxito.
+FACTOR_AJUSTE_MUTACIONES indica el factor de la regla: si la tasa de éxito de la generación es mayor a TASA_EXITO_OBJETIVO el número de mutaciones se divide entre este factor,
+y si es menor se multiplica por él.
+MAX_MUTACIONES_ADAPTATIVO indica el número máximo de mutaciones por generación.
+MAX_POBLACION_ADAPTATIVO indica el tamaño máximo que puede alcanzar la población.
+GENERACIONES_ESTANCAMIENTO indica cuántas generaciones sin mejora se consideran un estancamiento.
+UMBRAL_DIVERSIDAD indica la diversidad mínima de la población (proporción promedio de posiciones en las que cada rompecabezas difiere del mejor);
+si hay estancamiento y la diversidad es menor, la población se duplica con rompecabezas aleatorios nuevos.
+'''
+TASA_EXITO_OBJETIVO = 0.2
+FACTOR_AJUSTE_MUTACIONES = 1.5
+MAX_MUTACIONES_ADAPTATIVO = 64
+MAX_POBLACION_ADAPTATIVO = 64
+GENERACIONES_ESTANCAMIENTO = 25
+UMBRAL_DIVERSIDAD = 0.1
+
 def copiar_matriz(matriz_original):
     """
     Crea una copia profunda de una matriz de objetos Pieza.
@@ -48,6 +77,28 @@ class PiezaNoValidaError(Exception):
     def __str__(self):
         return f"PiezaNoValidaError: {self.mensaje}" # Regresa el mensaje de error.
 
+'''
+Valores permitidos para los extremos de una pieza: 0 (borde plano), -1 (borde hacia adentro), 1 (borde hacia afuera) y 2 (control).
+'''
+VALORES_EXTREMOS_PERMITIDOS = {0, -1, 1, 2}
+
+def validar_extremos(valores):
+    '''
+    Valida los valores de los extremos de una pieza, tanto para Pieza como para PiezaCompacta.
+    Entrada: valores (lista) valores de los extremos [arriba, abajo, izquierda, derecha].
+    Salida: Ninguna, pero lanza PiezaNoValidaError si los valores no son válidos.
+    '''
+    if not all(v in VALORES_EXTREMOS_PERMITIDOS for v in valores): # Si la pieza no se puede crear correctamente.
+        raise PiezaNoValidaError(
+            f"Los valores {valores} no son válidos. Solo se permiten 0, -1, 1 o 2."
+        )
+        
+    valores_no_cero = sum(1 for v in valores if v != 0)
+    if valores_no_cero < 2: # Si la pieza no tiene al menos dos valores diferentes de cero (no puede haber una pieza con tres bordes planos).
+        raise PiezaNoValidaError(
+            f"La pieza debe tener al menos dos valores diferentes de cero. Valores actuales: {valores}"
+        )
+
 class Matriz:
     '''
     Definimos la clase Matriz, la cual nos permitirá crear una matriz de N x M con valores secuenciales o aleatorios.
@@ -133,29 +184,30 @@ class Pieza:
         Los valores permitidos de los extremos son: 0 (borde plano), -1 (borde hacia adentro), 1 (borde hacia afuera) y 2 (control).
         Salida: Una pieza con los valores de los extremos, un diccionario con sus conexiones (vacías por el momento) y su identificador.
         '''
-        valores = [v_arriba, v_abajo, v_izquierda, v_derecha]
-        valores_permitidos = {0, -1, 1, 2}
-        
-        if not all(v in valores_permitidos for v in valores): # Si la pieza no se puede crear correctamente.
-            raise PiezaNoValidaError(
-                f"Los valores {valores} no son válidos. Solo se permiten 0, -1, 1 o 2."
-            )
-            
-        valores_no_cero = sum(1 for v in valores if v != 0)
-        if valores_no_cero < 2: # Si la pieza no tiene al menos dos valores diferentes de cero (no puede haber una pieza con tres bordes planos).
-            raise PiezaNoValidaError(
-                f"La pieza debe tener al menos dos valores diferentes de cero. Valores actuales: {valores}"
-            )
+        validar_extremos([v_arriba, v_abajo, v_izquierda, v_derecha])
         
         # arriba, abajo, izquierda y derecha son las conexiones de la pieza, por el momento vacías.
         self.arriba = None
         self.abajo = None
         self.izquierda = None
         self.derecha = None
-        self.extremos = {"izq":v_izquierda, "der": v_derecha, "arr": v_arriba, "aba": v_abajo}
+        self.valores_extremos = {"izq":v_izquierda, "der": v_derecha, "arr": v_arriba, "aba": v_abajo} # Se accede a través de extremos.
         self.id = id_pieza
         self.posicion = None  # (fila, columna), por el momento vacía pues no pertenece a ningún rompecabezas.
     
+    @property
+    def extremos(self):
+        '''
+        Regresa el diccionario con los extremos de la pieza ("izq", "der", "arr", "aba").
+        Se guarda en valores_extremos, que es lo que leen fitness y la verificación de conexiones; al reasignar extremos ambos siguen siendo el mismo diccionario.
+        valores_extremos es solo para lectura, igual que en PiezaCompacta; los extremos se modifican a través de extremos.
+        '''
+        return self.valores_extremos
+    
+    @extremos.setter
+    def extremos(self, valor):
+        self.valores_extremos = valor
+    
     def copiar(self):
         """
         Crea una copia de la pieza actual, sin las conexiones.
@@ -201,24 +253,169 @@ class Pieza:
         '''
         return f"Pieza {self.id} ({self.posicion}) -> {self.extremos}"
 
+'''
+Desplazamiento (en bits) de cada extremo dentro del entero empaquetado de PiezaCompacta.
+Cada extremo ocupa 2 bits y se guarda como valor + 1, de forma que -1, 0, 1 y 2 se representan con 0, 1, 2 y 3.
+'''
+DESPLAZAMIENTO_EXTREMOS = {"arr": 0, "aba": 2, "izq": 4, "der": 6}
+
+def empaquetar_extremos(v_arriba, v_abajo, v_izquierda, v_derecha):
+    '''
+    Empaqueta los cuatro extremos de una pieza en un solo entero.
+    Entrada: v_arriba, v_abajo, v_izquierda, v_derecha (int) valores de los extremos (-1, 0, 1 o 2).
+    Salida: bordes (int) entero de 8 bits con los cuatro extremos.
+    '''
+    return (v_arriba + 1) | (v_abajo + 1) << 2 | (v_izquierda + 1) << 4 | (v_derecha + 1) << 6
+
+'''
+Tabla con los extremos ya desempaquetados para cada uno de los 256 valores posibles de bordes.
+Cada entrada es un diccionario de solo lectura con las mismas llaves que Pieza.extremos, así la lectura en fitness no requiere operaciones de bits.
+'''
+TABLA_EXTREMOS = tuple(
+    MappingProxyType({clave: ((bordes >> desplazamiento) & 3) - 1 for clave, desplazamiento in (("izq", 4), ("der", 6), ("arr", 0), ("aba", 2))})
+    for bordes in range(256)
+)
+
+class ExtremosCompactos(MutableMapping):
+    '''
+    Vista tipo diccionario sobre los extremos empaquetados de una PiezaCompacta.
+    Permite leer y asignar pieza.extremos["arr"] igual que con Pieza, escribiendo directamente en el entero de la pieza.
+    Al heredar de MutableMapping también tiene get, values, items y comparación con diccionarios.
+    '''
+    __slots__ = ("pieza",)
+
+    def __init__(self, pieza):
+        self.pieza = pieza
+
+    def __getitem__(self, clave):
+        return self.pieza.valores_extremos[clave]
+
+    def __setitem__(self, clave, valor):
+        if type(valor) is not int or valor not in VALORES_EXTREMOS_PERMITIDOS: # Un valor fuera de rango o que no sea entero corrompería los demás extremos del entero.
+            raise PiezaNoValidaError(
+                f"El valor {valor} no es válido. Solo se permiten 0, -1, 1 o 2."
+            )
+        desplazamiento = DESPLAZAMIENTO_EXTREMOS[clave]
+        self.pieza.bordes = (self.pieza.bordes & ~(3 << desplazamiento)) | (valor + 1) << desplazamiento
+        self.pieza.valores_extremos = TABLA_EXTREMOS[self.pieza.bordes] # Mantenemos sincronizada la lectura rápida.
+
+    def __delitem__(self, clave):
+        raise TypeError("Los extremos de una pieza son fijos, no se pueden eliminar.") # Operación no soportada, igual que en otros diccionarios de llaves fijas.
+
+    def __iter__(self):
+        return iter(("izq", "der", "arr", "aba"))
+
+    def __len__(self):
+        return 4
+
+    def __repr__(self):
+        return repr(dict(self.items())) # Mismo formato que el diccionario de Pieza.
+
+class PiezaCompacta:
+    '''
+    Variante de Pieza con __slots__, pensada para rompecabezas grandes.
+    Los cuatro extremos se empaquetan en un entero (bordes) y la posición se guarda como dos enteros (fila, columna),
+    pero se exponen los mismos atributos extremos, valores_extremos y posicion que en Pieza, por lo que fitness, verificar_conexiones y visualizar_rompecabezas funcionan igual.
+    En ambas clases valores_extremos es solo para lectura (aquí es un diccionario de solo lectura compartido); los extremos se modifican a través de extremos.
+    A diferencia de Pieza, posicion es una tupla (fila, columna): se asigna completa (pieza.posicion = [fila, columna]) y no se puede modificar un elemento.
+    '''
+    __slots__ = ("arriba", "abajo", "izquierda", "derecha", "bordes", "valores_extremos", "id", "fila", "columna")
+
+    def __init__(self, v_arriba=0, v_abajo=0, v_izquierda=0, v_derecha=0, id_pieza=0):
+        '''
+        Constructor de la clase PiezaCompacta, con las mismas validaciones que Pieza.
+        Entrada: v_arriba (int) valor del extremo superior, v_abajo (int) valor del extremo inferior, v_izquierda (int) valor del extremo izquierdo, v_derecha (int) valor del extremo derecho, id_pieza (int) identificador de la pieza.
+        Salida: Una pieza con los extremos empaquetados, sin conexiones y sin posición.
+        '''
+        validar_extremos([v_arriba, v_abajo, v_izquierda, v_derecha])
+        
+        self.arriba = None
+        self.abajo = None
+        self.izquierda = None
+        self.derecha = None
+        self.bordes = empaquetar_extremos(v_arriba, v_abajo, v_izquierda, v_derecha)
+        self.valores_extremos = TABLA_EXTREMOS[self.bordes] # Extremos desempaquetados de solo lectura, compartidos entre piezas iguales.
+        self.id = id_pieza
+        self.fila = 0 # 0 indica que no pertenece a ningún rompecabezas.
+        self.columna = 0
+    
+    @property
+    def extremos(self):
+        '''
+        Regresa una vista de los extremos con las mismas llaves que Pieza ("izq", "der", "arr", "aba").
+        '''
+        return ExtremosCompactos(self)
+    
+    @property
+    def posicion(self):
+        '''
+        Regresa la posición (fila, columna) de la pieza, o None si no pertenece a ningún rompecabezas.
+        '''
+        if self.fila == 0:
+            return None
+        return (self.fila, self.columna)
+    
+    @posicion.setter
+    def posicion(self, valor):
+        if valor is None:
+            self.fila, self.columna = 0, 0
+        else:
+            self.fila, self.columna = valor
+    
+    def copiar(self):
+        """
+        Crea una copia de la pieza actual, sin las conexiones ni la posición.
+        Como la pieza original ya fue validada, la copia no vuelve a ejecutar las validaciones del constructor.
+        Entrada: Ninguna.
+        Salida: Una nueva instancia de PiezaCompacta con los mismos extremos e identificador.
+        """
+        copia = PiezaCompacta.__new__(PiezaCompacta)
+        copia.arriba = None
+        copia.abajo = None
+        copia.izquierda = None
+        copia.derecha = None
+        copia.bordes = self.bordes
+        copia.valores_extremos = self.valores_extremos
+        copia.id = self.id
+        copia.fila = 0
+        copia.columna = 0
+        return copia
+    
+    conectar_con = Pieza.conectar_con # Las conexiones se manejan igual que en Pieza.
+    
+    def __str__(self):
+        '''
+        Imprime el contenido de la pieza.
+        Entrada: Ninguna.
+        Salida: La pieza en forma de cadena de texto, con el mismo formato que Pieza.
+        '''
+        posicion = None if self.fila == 0 else [self.fila, self.columna]
+        return f"Pieza {self.id} ({posicion}) -> {self.extremos}"
+
 class Rompecabezas:
     '''
     Definimos la clase Rompecabezas, la cual nos permitirá realizar el algoritmo evolutivo para resolver el rompecabezas.
     '''
-    def __init__(self, n, m, poblacion=1, ratio_mut=1):
+    def __init__(self, n, m, poblacion=1, ratio_mut=1, adaptativo=False, compacto=False):
         '''
         Constructor de la clase Rompecabezas, crea un rompecabezas solución a partir de una matriz secuencial y luego utiliza el algoritmo evolutivo para resolverlo. 
-        Entrada: n (int) número de renglones del rompecabezas, m (int) número de columnas del rompecabezas.
+        Entrada: n (int) número de renglones del rompecabezas, m (int) número de columnas del rompecabezas, 
+            poblacion (int) tamaño de la población inicial, ratio_mut (float) proporción de rompecabezas mutados en cada generación,
+            adaptativo (bool) indica si el número de mutaciones y el tamaño de la población se ajustan durante la ejecución,
+            compacto (bool) indica si se usa PiezaCompacta en lugar de Pieza para reducir la memoria.
         Salida: 
             Ninguna, pero imprime el rompecabezas resuelto y visualizado, 
             el número de generaciones necesarias para resolver el rompecabezas,
             el tiempo de ejecución.
+            En modo adaptativo, la trayectoria de los parámetros queda guardada en self.trayectoria.
         '''
         self.n = n
         self.m = m
+        self.clase_pieza = PiezaCompacta if compacto else Pieza # Clase con la que se crean las piezas del rompecabezas.
+        self.trayectoria = [] # Registro por generación del fitness, la población y el número de mutaciones.
         self.matriz_solucion = Matriz(n, m).matriz # Crear una matriz secuencial para el rompecabezas solución.
         self.tiempo_inicio = time.time() # Iniciar el contador de tiempo para optimizar parámetros.
-        self.matriz_final, self.generaciones = self.algoritmo_evolutivo(n, m, self.matriz_solucion, poblacion, ratio_mut) # Resolver el rompecabezas, a partir de la matriz solución y los parámetros de población y ratio de mutación.
+        self.matriz_final, self.generaciones = self.algoritmo_evolutivo(n, m, self.matriz_solucion, poblacion, ratio_mut, adaptativo) # Resolver el rompecabezas, a partir de la matriz solución y los parámetros de población y ratio de mutación.
         self.visualizar_rompecabezas(self.matriz_final) # Proyectar el rompecabezas resuelto.
         print(f"Tiempo Total: {time.time() - self.tiempo_inicio} segundos.") # Mostrar el tiempo total de ejecución.
         print(f"Generaciones: {self.generaciones}") # Mostrar el número de generaciones necesarias para resolver el rompecabezas.
@@ -244,7 +441,7 @@ class Rompecabezas:
                 derecha = 0 if j == m-1 else 2 # Si es la última columna, el extremo derecho es 0 (borde liso derecho), de lo contrario es 2 (control).
                 
                 id_pieza = matriz_ids[i][j] # Obtener la posición matricial de la pieza.
-                pieza = Pieza(arriba, abajo, izquierda, derecha, id_pieza)
+                pieza = self.clase_pieza(arriba, abajo, izquierda, derecha, id_pieza)
                 pieza.posicion = [i+1, j+1] # Asignar la posición matricial de la pieza para recordar dónde está en la solución.
                 
                 piezas[id_pieza] = pieza # Guardar la pieza en un diccionario por identificador.
@@ -350,68 +547,71 @@ class Rompecabezas:
         Entrada: matriz_piezas (matriz) matriz de piezas.
         Salida: lista de errores de conexión.
         '''
-        n = len(matriz_piezas)
-        m = len(matriz_piezas[0])
-        conexiones_incorrectas = []
-        
-        for i in range(n):
-            for j in range(m):
-                pieza = matriz_piezas[i][j]
-                
-                # Verificar conexión superior.
-                if i > 0:
-                    pieza_arriba = matriz_piezas[i-1][j]
-                    if pieza.extremos["arr"] + pieza_arriba.extremos["aba"] != 0 or (pieza_arriba.extremos["aba"] == 0 and pieza.extremos["arr"] == 0):
-                        conexiones_incorrectas.append(
-                            f"Conexión incorrecta entre {pieza.id} y {pieza_arriba.id} (arriba)" # Indicar entre que piezas hay un error.
-                        )
-                
-                # Verificar conexión izquierda.
-                if j > 0:
-                    pieza_izq = matriz_piezas[i][j-1]
-                    if pieza.extremos["izq"] + pieza_izq.extremos["der"] != 0 or (pieza_izq.extremos["der"] == 0 and pieza.extremos["izq"] == 0):
-                        conexiones_incorrectas.append(
-                            f"Conexión incorrecta entre {pieza.id} y {pieza_izq.id} (izquierda)" # Indicar entre que piezas hay un error.
-                        )
-        
-        return conexiones_incorrectas
-    
-    def visualizar_rompecabezas(self, matriz_piezas, mostrar_errores=True):
+        return [
+            f"Conexión incorrecta entre {id_a} y {id_b} ({direccion})" # Indicar entre que piezas hay un error.
+            for id_a, id_b, direccion in iterar_conexiones_incorrectas(matriz_piezas)
+        ]
+
+    def reporte_conexiones(self, matriz_piezas):
+        '''
+        Genera un reporte estructurado de las conexiones incorrectas, sin construir una cadena por cada error.
+        Entrada: matriz_piezas (matriz) matriz de piezas.
+        Salida: ReporteConexiones con los conteos de errores y un iterador perezoso de tuplas (id_a, id_b, direccion).
+        '''
+        return ReporteConexiones(matriz_piezas)
+
+    def renderizar_rompecabezas(self, matriz_piezas, mostrar_errores=True):
         """
-        Visualiza la matriz de piezas (rompecabezas) y sus conexiones, opcionalmente mostrando errores si los hay.
-        Entrada: matriz_piezas (matriz) matriz de piezas, mostrar_errores (bool) indica si se deben mostrar los errores de conexión.
+        Construye en un solo buffer la representación de la matriz de piezas (rompecabezas) y sus conexiones.
+        Si el rompecabezas excede UMBRAL_VISUALIZACION renglones o columnas, solo se dibuja una ventana de la esquina superior izquierda
+        y se agrega un resumen; los errores se limitan a MAX_ERRORES_VISUALIZADOS.
+        Entrada: matriz_piezas (matriz) matriz de piezas, mostrar_errores (bool) indica si se deben incluir los errores de conexión.
+        Salida: la representación del rompecabezas en forma de cadena de texto.
         """
         n = len(matriz_piezas)
         m = len(matriz_piezas[0])
+        n_visible = min(n, UMBRAL_VISUALIZACION) # Renglones que se dibujan.
+        m_visible = min(m, UMBRAL_VISUALIZACION) # Columnas que se dibujan.
+        separador = "-" * (m_visible * 20)
         
-        print("\nRompecabezas:")
-        print("-" * (m * 20))
+        lineas = ["", "Rompecabezas:", separador]
         
-        for i in range(n):
+        for i in range(n_visible):
+            renglon = matriz_piezas[i][:m_visible]
             # Primera línea: extremos superiores de las piezas.
-            for j in range(m):
-                print(f"      {matriz_piezas[i][j].extremos['arr']}      ", end="")
-            print()
-            
+            lineas.append("".join(f"      {pieza.valores_extremos['arr']}      " for pieza in renglon))
             # Segunda línea: extremos izquierdos y derechos de las piezas, junto con el identificador de la pieza.
-            for j in range(m):
-                print(f"{matriz_piezas[i][j].extremos['izq']}  ({matriz_piezas[i][j].id:2d})  {matriz_piezas[i][j].extremos['der']}", end=" ")
-            print()
-            
+            lineas.append("".join(f"{pieza.valores_extremos['izq']}  ({pieza.id:2d})  {pieza.valores_extremos['der']} " for pieza in renglon))
             # Tercera línea: extremos inferiores de las piezas.
-            for j in range(m):
-                print(f"      {matriz_piezas[i][j].extremos['aba']}      ", end="")
-            print()
-            print("-" * (m * 20))
+            lineas.append("".join(f"      {pieza.valores_extremos['aba']}      " for pieza in renglon))
+            lineas.append(separador)
+        
+        if n_visible < n or m_visible < m: # Si el rompecabezas es muy grande, indicamos qué parte se muestra.
+            lineas.append(f"Mostrando {n_visible}x{m_visible} de {n}x{m} piezas.")
         
         if mostrar_errores: # Si queremos mostrar los errores.
-            errores = self.verificar_conexiones(matriz_piezas)
-            if errores:
-                print("\nConexiones incorrectas:")
-                for error in errores:
-                    print(f"- {error}")
+            reporte = self.reporte_conexiones(matriz_piezas)
+            if reporte:
+                lineas.append("")
+                lineas.append(str(reporte))
+                for indice, (id_a, id_b, direccion) in enumerate(reporte):
+                    if indice == MAX_ERRORES_VISUALIZADOS: # Solo listamos los primeros errores.
+                        lineas.append(f"- ... y {reporte.total - indice} más.")
+                        break
+                    lineas.append(f"- Conexión incorrecta entre {id_a} y {id_b} ({direccion})")
             else:
-                print("\nTodas las conexiones son correctas!")
+                lineas.append("")
+                lineas.append("Todas las conexiones son correctas!")
+        
+        return "\n".join(lineas)
+    
+    def visualizar_rompecabezas(self, matriz_piezas, mostrar_errores=True):
+        """
+        Visualiza la matriz de piezas (rompecabezas) y sus conexiones, opcionalmente mostrando errores si los hay.
+        La salida se construye con renderizar_rompecabezas y se escribe de una sola vez.
+        Entrada: matriz_piezas (matriz) matriz de piezas, mostrar_errores (bool) indica si se deben mostrar los errores de conexión.
+        """
+        print(self.renderizar_rompecabezas(matriz_piezas, mostrar_errores))
 
     def fitness(self, matriz_piezas):
         '''
@@ -425,31 +625,33 @@ class Rompecabezas:
         for i in range(n):
             for j in range(m):
                 pieza_actual = matriz_piezas[i][j]
+                extremos = pieza_actual.valores_extremos # Leemos los extremos una sola vez por pieza.
                 
                 # Los bordes tienen que ser 0.
-                if i == 0 and pieza_actual.extremos['arr'] != 0:
+                if i == 0 and extremos['arr'] != 0:
                         contador_fit += PENALIZACION_BORDE_NO_LISO
-                if i == n-1 and pieza_actual.extremos['aba'] != 0:
+                if i == n-1 and extremos['aba'] != 0:
                     contador_fit += PENALIZACION_BORDE_NO_LISO
-                if j == 0 and pieza_actual.extremos['izq'] != 0:
+                if j == 0 and extremos['izq'] != 0:
                         contador_fit += PENALIZACION_BORDE_NO_LISO
-                if j == m-1 and pieza_actual.extremos['der'] != 0:
+                if j == m-1 and extremos['der'] != 0:
                         contador_fit += PENALIZACION_BORDE_NO_LISO
 
                 # Verificar conexión superior.
                 if i > 0:
-                    pieza_arriba = matriz_piezas[i-1][j]
-                    if pieza_actual.extremos["arr"] + pieza_arriba.extremos["aba"] != 0 or (pieza_arriba.extremos["aba"] == 0 and pieza_actual.extremos["arr"] == 0):
+                    extremos_arriba = matriz_piezas[i-1][j].valores_extremos
+                    if extremos["arr"] + extremos_arriba["aba"] != 0 or (extremos_arriba["aba"] == 0 and extremos["arr"] == 0):
                         contador_fit += PENALIZACION_CONEXION_INCORRECTA
                 
                 # Verificar conexión izquierda.
                 if j > 0:
-                    pieza_izq = matriz_piezas[i][j-1]
-                    if pieza_actual.extremos["izq"] + pieza_izq.extremos["der"] != 0 or (pieza_izq.extremos["der"] == 0 and pieza_actual.extremos["izq"] == 0):
+                    extremos_izq = matriz_piezas[i][j-1].valores_extremos
+                    if extremos["izq"] + extremos_izq["der"] != 0 or (extremos_izq["der"] == 0 and extremos["izq"] == 0):
                         contador_fit += PENALIZACION_CONEXION_INCORRECTA
 
                 # Si la pieza no está en la posición correcta.
-                if pieza_actual.id != (pieza_actual.posicion[0]-1)*m + pieza_actual.posicion[1]:
+                fila, columna = pieza_actual.posicion
+                if pieza_actual.id != (fila-1)*m + columna:
                     contador_fit += PENALIZACION_PIEZA_FUERA_DE_POSICION
 
         return contador_fit
@@ -475,10 +677,8 @@ class Rompecabezas:
         matriz_piezas[h][k] = aux
 
         # Actualizamos las posiciones de las piezas.
-        matriz_piezas[i][j].posicion[0] = i+1
-        matriz_piezas[i][j].posicion[1] = j+1
-        matriz_piezas[h][k].posicion[0] = h+1
-        matriz_piezas[h][k].posicion[1] = k+1
+        matriz_piezas[i][j].posicion = [i+1, j+1]
+        matriz_piezas[h][k].posicion = [h+1, k+1]
         
         # Actualizamos las conexiones de las segunda pieza intercambiada.
         if i>0: # Si no es el borde superior, la conectamos con la pieza de arriba, de otra forma con una vacía.
@@ -524,23 +724,33 @@ class Rompecabezas:
         
         return matriz_piezas
 
-    def algoritmo_evolutivo(self, num_n, num_m, matriz_sol, poblacion=1, ratio_mut=1):
+    def algoritmo_evolutivo(self, num_n, num_m, matriz_sol, poblacion=1, ratio_mut=1, adaptativo=False):
         '''
         Realiza el algoritmo evolutivo para resolver el rompecabezas.
+        En modo adaptativo, el número de mutaciones por generación sigue la regla de 1/5 de éxito (disminuye cuando más de una de cada cinco mutaciones mejora a su padre
+        y aumenta cuando menos lo hacen), y la población se duplica con rompecabezas aleatorios cuando hay estancamiento con poca diversidad y se reduce a la mitad,
+        hasta su tamaño inicial, cuando hay mejora.
         Entrada: 
             num_n (int) número de renglones del rompecabezas, 
             num_m (int) número de columnas del rompecabezas, 
             matriz_sol (matriz) matriz solución del rompecabezas, 
             poblacion (int): tamaño de la población inicial, 
-            ratio_mut (float): proporción de rompecabezas mutados en cada generación.
+            ratio_mut (float): proporción de rompecabezas mutados en cada generación,
+            adaptativo (bool): indica si el número de mutaciones y el tamaño de la población se ajustan durante la ejecución.
         Salida: 
             matriz_piezas (matriz) matriz de piezas resueltas y 
             generaciones (int) número de generaciones necesarias para resolver el rompecabezas.
+            En modo adaptativo, la trayectoria por generación se guarda en self.trayectoria.
         '''
         piezas_solucion, matriz_solucion = self.crear_grafo_solucion(matriz_sol)
         min_fitness = (num_n*num_m)*4 + (num_n*num_m) + (num_n-1)*num_m + (num_m-1)*num_n # Iniciamos el valor de fitness mínimo con el máximo posible.
         arreglo_rompecabezas = []
         generaciones = 0
+        self.trayectoria = [] # Solo se llena en modo adaptativo.
+        poblacion_minima = poblacion # En modo adaptativo, la población nunca es menor a la inicial.
+        mutaciones = float(max(1, int(poblacion * ratio_mut))) # Número de mutaciones como flotante para poder ajustarlo gradualmente.
+        mejor_fitness = min_fitness
+        estancamiento = 0 # Generaciones consecutivas sin mejora.
         
         while min_fitness !=0: # Mientras no se haya resuelto el rompecabezas, es decir, no hemos minimizado el valor de la función fitness.
             arreglo_fitness = []
@@ -551,8 +761,12 @@ class Rompecabezas:
                     arreglo_rompecabezas.append(rompecabezas_aleatorio) # Guardamos el rompecabezas aleatoria en el arreglo.
                     
             
-            num_mut = max(1, int(poblacion * ratio_mut)) # Definimos el número de mutaciones, dependiendo del tamaño de la población.
-            random_list = [random.randint(0, len(arreglo_rompecabezas)-1) for _ in range(num_mut)] # Creamos una lista de índices aleatorios para mutar esos rompecabezas.
+            if adaptativo:
+                num_mut = max(1, round(mutaciones)) # El número de mutaciones se ajusta en cada generación.
+            else:
+                num_mut = max(1, int(poblacion * ratio_mut)) # Definimos el número de mutaciones, dependiendo del tamaño de la población.
+            num_padres = len(arreglo_rompecabezas)
+            random_list = [random.randint(0, num_padres-1) for _ in range(num_mut)] # Creamos una lista de índices aleatorios para mutar esos rompecabezas.
             
             for num in random_list:
                 arreglo_rompecabezas.append(self.mutacion(arreglo_rompecabezas[num])) # Mutamos los rompecabezas y los añadimos a la población.
@@ -560,13 +774,52 @@ class Rompecabezas:
             for i in range(len(arreglo_rompecabezas)):
                 arreglo_fitness.append(self.fitness(arreglo_rompecabezas[i])) # Calculamos el valor de la función fitness para cada rompecabezas y lo guardamos.
             
-            indices_peores = obtener_indices_peores(arreglo_fitness, num_mut) # Obtenemos los índices de los peores rompecabezas según la función fitness.
+            if adaptativo: # Contamos las mutaciones que mejoraron a su padre, antes de eliminar a los peores.
+                exitos = sum(1 for k, num in enumerate(random_list) if arreglo_fitness[num_padres + k] < arreglo_fitness[num])
+            
+            num_eliminar = max(0, len(arreglo_rompecabezas) - poblacion) # Eliminamos lo necesario para volver al tamaño de población (num_mut si no es adaptativo).
+            indices_peores = obtener_indices_peores(arreglo_fitness, num_eliminar) # Obtenemos los índices de los peores rompecabezas según la función fitness.
             for indice in sorted(indices_peores, reverse=True):  # Eliminar de mayor a menor para no afectar los índices, es decir, nos quedamos con los mejores rompecabezas.
                 arreglo_rompecabezas.pop(indice)
                 arreglo_fitness.pop(indice)
             
             min_fitness = min(arreglo_fitness) # Obtenemos el valor mínimo de la función fitness de los rompecabezas de la población.
             indice = arreglo_fitness.index(min_fitness) # Obtenemos el rompecabezas con valor de función fitness mínimo.
+            
+            if adaptativo:
+                diversidad = calcular_diversidad(arreglo_rompecabezas, indice)
+                
+                if min_fitness < mejor_fitness: # Si hubo mejora, reiniciamos el contador de estancamiento.
+                    mejor_fitness = min_fitness
+                    estancamiento = 0
+                else:
+                    estancamiento += 1
+                
+                self.trayectoria.append({
+                    "generacion": generaciones + 1,
+                    "fitness": min_fitness,
+                    "poblacion": len(arreglo_rompecabezas),
+                    "num_mut": num_mut,
+                    "tasa_exito": exitos / num_mut,
+                    "diversidad": diversidad
+                })
+                
+                # Regla de 1/5 de éxito sobre el número de mutaciones.
+                if exitos / num_mut > TASA_EXITO_OBJETIVO:
+                    mutaciones = max(1, mutaciones / FACTOR_AJUSTE_MUTACIONES)
+                elif exitos / num_mut < TASA_EXITO_OBJETIVO:
+                    mutaciones = min(MAX_MUTACIONES_ADAPTATIVO, mutaciones * FACTOR_AJUSTE_MUTACIONES)
+                
+                # Tamaño de la población: se duplica con estancamiento y poca diversidad, se reduce a la mitad con mejora.
+                if estancamiento >= GENERACIONES_ESTANCAMIENTO and diversidad < UMBRAL_DIVERSIDAD:
+                    poblacion = min(MAX_POBLACION_ADAPTATIVO, poblacion * 2)
+                    estancamiento = 0
+                    while len(arreglo_rompecabezas) < poblacion: # Los lugares nuevos se llenan con rompecabezas aleatorios para recuperar diversidad.
+                        matriz_aleatoria = Matriz(num_n, num_m, True).matriz
+                        arreglo_rompecabezas.append(self.crear_grafo_aleatorio(matriz_aleatoria, piezas_solucion))
+                elif estancamiento == 0:
+                    poblacion = max(poblacion_minima, poblacion // 2)
+            
             print(min_fitness) # Lo imprimimos para ver el avance hacia una solución.
             generaciones += 1 # Una vez terminada la generación, incrementamos el contador de generaciones.
         
@@ -591,6 +844,91 @@ def obtener_indices_peores(lista_fitness, num_mut):
     
     return indices_peores
 
+def iterar_conexiones_incorrectas(matriz_piezas):
+    '''
+    Recorre la matriz de piezas y genera, de forma perezosa, las conexiones incorrectas.
+    Entrada: matriz_piezas (matriz) matriz de piezas.
+    Salida: generador de tuplas (id_a, id_b, direccion), donde direccion es "arriba" o "izquierda" respecto a la pieza id_a.
+    '''
+    n = len(matriz_piezas)
+    m = len(matriz_piezas[0])
+    
+    for i in range(n):
+        for j in range(m):
+            pieza = matriz_piezas[i][j]
+            extremos = pieza.valores_extremos # Leemos los extremos una sola vez por pieza.
+            
+            # Verificar conexión superior.
+            if i > 0:
+                pieza_arriba = matriz_piezas[i-1][j]
+                extremos_arriba = pieza_arriba.valores_extremos
+                if extremos["arr"] + extremos_arriba["aba"] != 0 or (extremos_arriba["aba"] == 0 and extremos["arr"] == 0):
+                    yield (pieza.id, pieza_arriba.id, "arriba")
+            
+            # Verificar conexión izquierda.
+            if j > 0:
+                pieza_izq = matriz_piezas[i][j-1]
+                extremos_izq = pieza_izq.valores_extremos
+                if extremos["izq"] + extremos_izq["der"] != 0 or (extremos_izq["der"] == 0 and extremos["izq"] == 0):
+                    yield (pieza.id, pieza_izq.id, "izquierda")
+
+class ReporteConexiones:
+    '''
+    Reporte estructurado de las conexiones incorrectas de una matriz de piezas.
+    Guarda únicamente los conteos; los errores se recorren de forma perezosa al iterar sobre el reporte.
+    El reporte solo es válido mientras la matriz no se modifique: los conteos se calculan al crearlo, pero la iteración recorre la matriz actual,
+    por lo que si la matriz cambia (por ejemplo, al intercambiar piezas), total y los errores iterados pueden no coincidir.
+    '''
+    def __init__(self, matriz_piezas):
+        '''
+        Constructor de la clase ReporteConexiones, cuenta las conexiones incorrectas sin guardarlas.
+        Entrada: matriz_piezas (matriz) matriz de piezas.
+        Salida: Un reporte con el total de errores y los errores por dirección (arriba, izquierda).
+        '''
+        self.matriz_piezas = matriz_piezas
+        self.arriba = 0
+        self.izquierda = 0
+        for _, _, direccion in iterar_conexiones_incorrectas(matriz_piezas):
+            if direccion == "arriba":
+                self.arriba += 1
+            else:
+                self.izquierda += 1
+        self.total = self.arriba + self.izquierda
+    
+    def __iter__(self):
+        '''
+        Recorre de nuevo la matriz y genera las conexiones incorrectas como tuplas (id_a, id_b, direccion).
+        Coincide con los conteos del reporte solo si la matriz no se ha modificado desde que se creó.
+        '''
+        return iterar_conexiones_incorrectas(self.matriz_piezas)
+    
+    def __len__(self):
+        return self.total
+    
+    def __str__(self):
+        '''
+        Imprime el resumen del reporte.
+        Entrada: Ninguna.
+        Salida: El resumen en forma de cadena de texto.
+        '''
+        return f"Conexiones incorrectas: {self.total} ({self.arriba} arriba, {self.izquierda} izquierda)"
+
+def calcular_diversidad(arreglo_rompecabezas, indice_mejor):
+    '''
+    Calcula la diversidad de la población como la proporción promedio de posiciones en las que cada rompecabezas tiene una pieza distinta al mejor.
+    Entrada: arreglo_rompecabezas (lista) lista de matrices de piezas, indice_mejor (int) índice del rompecabezas con menor fitness.
+    Salida: diversidad (float) valor entre 0 (todos iguales al mejor o un solo individuo) y 1 (ninguna pieza en la misma posición que el mejor).
+    '''
+    if len(arreglo_rompecabezas) < 2:
+        return 0
+    ids_mejor = [pieza.id for renglon in arreglo_rompecabezas[indice_mejor] for pieza in renglon]
+    diferencias = 0
+    for k, rompecabezas in enumerate(arreglo_rompecabezas):
+        if k != indice_mejor:
+            ids = (pieza.id for renglon in rompecabezas for pieza in renglon)
+            diferencias += sum(1 for id_mejor, id_pieza in zip(ids_mejor, ids) if id_mejor != id_pieza)
+    return diferencias / (len(ids_mejor) * (len(arreglo_rompecabezas) - 1))
+
 class Optimizar:
     '''
     Clase que crea un objeto Optimizar para optimizar los parámetros de población y ratio de mutación en el algoritmo evolutivo.
@@ -681,6 +1019,10 @@ def main():
     #Argumentos por si no queremos optimizar.
     poblacion_optima = 1
     ratio_mutacion_optimo = 1
+    # Si es True, el número de mutaciones y la población se ajustan durante la ejecución, sin necesidad de optimizar.
+    adaptativo = False
+    # Si es True, se usa PiezaCompacta para reducir la memoria en rompecabezas grandes.
+    compacto = False
     
     '''
     # Optimización de parámetros:
@@ -698,7 +1040,7 @@ def main():
     '''
     
     # Crear un rompecabezas con los parámetros óptimos, para que lo solucione lo más rápido posible.
-    Rompecabezas(n, m, poblacion_optima, ratio_mutacion_optimo) 
+    Rompecabezas(n, m, poblacion_optima, ratio_mutacion_optimo, adaptativo, compacto) 
     print(f"Parámetros: \n población: {poblacion_optima} \n ratio de mutación: {ratio_mutacion_optimo}")
     
 if __name__ == "__main__":